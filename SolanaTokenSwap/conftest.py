@@ -0,0 +1 @@
+# Puts SolanaTokenSwap on sys.path so tests import the package as `src`
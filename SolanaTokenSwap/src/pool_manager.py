@@ -1,18 +1,28 @@
 # pool_manager.py
-import json
+import hashlib
 import logging
+import mmap
+import os
 import subprocess
+import sys
 import time
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass, field
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple, Deque
-from collections import deque, defaultdict
+from typing import List, Dict, FrozenSet, Optional, Tuple
+from collections import defaultdict
+
+import numpy as np
+import orjson
+import simdjson
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-@dataclass(frozen=True)
+LIQUIDITY_HISTORY_SIZE = 1000
+_NO_POOLS = np.empty(0, dtype=np.intp)
+
+@dataclass(frozen=True, slots=True)
 class TokenMetadata:
     mint: str
     symbol: str
@@ -21,7 +31,7 @@ class TokenMetadata:
     logoURI: Optional[str] = None
     reserve: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class PoolInfo:
     poolAddress: str
     tokenA: TokenMetadata
@@ -30,6 +40,15 @@ class PoolInfo:
     fees: Dict[str, str]
     version: int
     last_updated: datetime = datetime.now()
+    reserveA_f: float = field(init=False, repr=False)
+    reserveB_f: float = field(init=False, repr=False)
+    totalSupply_f: float = field(init=False, repr=False)
+
+    def __post_init__(self):
+        # Reserves arrive as decimal strings; parse them once at ingest
+        self.reserveA_f = float(self.tokenA.reserve)
+        self.reserveB_f = float(self.tokenB.reserve)
+        self.totalSupply_f = float(self.liquidity["totalSupply"])
 
 class PoolManager:
     def __init__(self,
@@ -37,64 +56,79 @@ class PoolManager:
                  rpc_rate_limit: timedelta = timedelta(seconds=5),
                  liquidity_window: timedelta = timedelta(hours=24)):
         self.cache_path = Path("pool_cache.json")
-        self.cache_ttl = cache_ttl
-        self.rpc_rate_limit = rpc_rate_limit
-        self.last_rpc_call = datetime.min
+        self._last_cache_hash: Optional[bytes] = None
+        # Timing state is kept as time.monotonic() seconds to avoid datetime churn
+        self.cache_ttl_s = cache_ttl.total_seconds()
+        self.rpc_rate_limit_s = rpc_rate_limit.total_seconds()
+        self.last_rpc_call = float("-inf")
+        self.last_update = float("-inf")
         self.pools: List[PoolInfo] = []
-        self.liquidity_history = defaultdict(lambda: deque(maxlen=1000))
+        self._by_address: Dict[str, PoolInfo] = {}
+        # Pool indices per mint plus numeric columns, all aligned with self.pools
+        self._by_mint: Dict[str, np.ndarray] = {}
+        self._mint_id: Dict[str, int] = {}
+        self._mA = np.empty(0, dtype=np.int32)
+        self._supply = np.empty(0, dtype=np.float64)
+        self._rA = np.empty(0, dtype=np.float64)
+        self._rB = np.empty(0, dtype=np.float64)
+        self._token_pairs: FrozenSet[Tuple[str, str]] = frozenset()
+        # Reused across refreshes so its internal buffers are allocated once
+        self._json_parser = simdjson.Parser()
+        # Per pool: ring of [timestamp, reserveA, reserveB, liquidity] rows and its write count
+        self.liquidity_history: Dict[str, Tuple[np.ndarray, int]] = {}
         self.liquidity_window = liquidity_window
 
     def _enforce_rate_limit(self):
         """Enforce RPC rate limiting with exponential backoff"""
-        elapsed = datetime.now() - self.last_rpc_call
-        if elapsed < self.rpc_rate_limit:
-            sleep_time = (self.rpc_rate_limit - elapsed).total_seconds()
+        elapsed = time.monotonic() - self.last_rpc_call
+        if elapsed < self.rpc_rate_limit_s:
+            sleep_time = self.rpc_rate_limit_s - elapsed
             logger.info(f"Enforcing rate limit. Sleeping for {sleep_time:.1f}s")
             time.sleep(sleep_time)
 
     def _execute_typescript_fetcher(self) -> List[PoolInfo]:
-        """Execute TypeScript fetchPools.ts with rate limiting"""
+        """Execute the precompiled fetchPools script with rate limiting"""
         self._enforce_rate_limit()
         try:
             result = subprocess.run(
-                ["ts-node", "typescriptRaydium/fetchPools.ts"],
+                ["node", "typescriptRaydium/dist/fetchPools.js"],
                 check=True,
-                capture_output=True,
-                text=True
+                capture_output=True
             )
-            self.last_rpc_call = datetime.now()
+            self.last_rpc_call = time.monotonic()
             return self._parse_ts_output(result.stdout)
         except subprocess.CalledProcessError as e:
             logger.error(f"TypeScript fetch failed: {e.stderr}")
             raise
-        except json.JSONDecodeError:
+        except ValueError:
             logger.error("Failed to parse TypeScript output")
             raise
 
-    def _parse_ts_output(self, output: str) -> List[PoolInfo]:
+    def _parse_ts_output(self, output: bytes) -> List[PoolInfo]:
+        """Lazily parse fetcher output, materialising only the fields PoolInfo needs"""
         try:
-            raw_data = json.loads(output)
+            raw_data = self._json_parser.parse(output)
             return [
                 PoolInfo(
                     poolAddress=pool["poolAddress"],
                     tokenA=TokenMetadata(
-                        mint=pool["tokenA"]["mint"],
-                        symbol=pool["tokenA"]["symbol"],
+                        mint=sys.intern(pool["tokenA"]["mint"]),
+                        symbol=sys.intern(pool["tokenA"]["symbol"]),
                         name=pool["tokenA"]["name"],
                         decimals=pool["tokenA"]["decimals"],
                         reserve=pool["tokenA"]["reserve"],
                         logoURI=pool["tokenA"].get("logoURI")
                     ),
                     tokenB=TokenMetadata(
-                        mint=pool["tokenB"]["mint"],
-                        symbol=pool["tokenB"]["symbol"],
+                        mint=sys.intern(pool["tokenB"]["mint"]),
+                        symbol=sys.intern(pool["tokenB"]["symbol"]),
                         name=pool["tokenB"]["name"],
                         decimals=pool["tokenB"]["decimals"],
                         reserve=pool["tokenB"]["reserve"],
                         logoURI=pool["tokenB"].get("logoURI")
                     ),
-                    liquidity=pool["liquidity"],
-                    fees=pool["fees"],
+                    liquidity=pool["liquidity"].as_dict(),
+                    fees=pool["fees"].as_dict(),
                     version=pool["version"]
                 ) for pool in raw_data
             ]
@@ -107,48 +141,80 @@ class PoolManager:
         if not self.cache_path.exists():
             return False
 
-        mtime = datetime.fromtimestamp(self.cache_path.stat().st_mtime)
-        if datetime.now() - mtime > self.cache_ttl:
+        # File mtimes are wall-clock, so this one check stays on time.time()
+        if time.time() - self.cache_path.stat().st_mtime > self.cache_ttl_s:
             return False
 
         try:
-            with open(self.cache_path, "r") as f:
-                self.pools = [PoolInfo(**pool) for pool in json.load(f)]
+            # Parse straight from the page cache instead of read()-ing a copy first
+            with open(self.cache_path, "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as raw:
+                    cached = orjson.loads(raw)
+                    digest = hashlib.blake2b(raw, digest_size=16).digest()
+            self.pools = [
+                PoolInfo(**{
+                    **pool,
+                    "tokenA": self._token_from_cache(pool["tokenA"]),
+                    "tokenB": self._token_from_cache(pool["tokenB"])
+                }) for pool in cached
+            ]
+            self._last_cache_hash = digest
+            self._rebuild_indices()
             logger.info(f"Loaded {len(self.pools)} pools from cache")
             return True
-        except (json.JSONDecodeError, TypeError) as e:
+        except (ValueError, KeyError, TypeError) as e:
+            # ValueError covers orjson decode errors and mmap of an empty file
             logger.warning(f"Invalid cache: {e}")
             return False
 
-    def _save_cache(self) -> None:
-        """Save current pools to cache"""
-        with open(self.cache_path, "w") as f:
-            json.dump(
-                [{
-                    "poolAddress": p.poolAddress,
-                    "tokenA": vars(p.tokenA),
-                    "tokenB": vars(p.tokenB),
-                    "liquidity": p.liquidity,
-                    "fees": p.fees,
-                    "version": p.version
-                } for p in self.pools],
-                f,
-                indent=2
-            )
+    @staticmethod
+    def _token_from_cache(token: Dict) -> TokenMetadata:
+        # Mints and symbols repeat across pools; interning shares one object per value
+        return TokenMetadata(**{
+            **token,
+            "mint": sys.intern(token["mint"]),
+            "symbol": sys.intern(token["symbol"])
+        })
+
+    def _save_cache(self, pretty: bool = False) -> None:
+        """Save current pools to cache, skipping the write when nothing changed.
+
+        The cache is written compact by default; pass pretty=True for an indented,
+        human-readable dump.
+        """
+        payload = orjson.dumps([{
+            "poolAddress": p.poolAddress,
+            "tokenA": asdict(p.tokenA),
+            "tokenB": asdict(p.tokenB),
+            "liquidity": p.liquidity,
+            "fees": p.fees,
+            "version": p.version
+        } for p in self.pools], option=orjson.OPT_INDENT_2 if pretty else None)
+        digest = hashlib.blake2b(payload, digest_size=16).digest()
+
+        if digest == self._last_cache_hash and self.cache_path.exists():
+            # Same contents: just bump the mtime so the TTL check in _load_cache stays valid
+            os.utime(self.cache_path)
+            return
+
+        tmp_path = self.cache_path.with_name(self.cache_path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, self.cache_path)
+        self._last_cache_hash = digest
 
     def refresh_pools(self, force: bool = False) -> None:
         """Refresh pool data with liquidity tracking"""
-        if not force and datetime.now() - self.last_update < self.cache_ttl:
+        if not force and time.monotonic() - self.last_update < self.cache_ttl_s:
             return
 
-        previous_pools = {p.poolAddress: p for p in self.pools}
-
         try:
             new_pools = self._execute_typescript_fetcher()
-            self._update_liquidity_history(previous_pools, new_pools)
+            self._update_liquidity_history(new_pools)
             self.pools = new_pools
+            self._rebuild_indices()
             self._save_cache()
-            self.last_update = datetime.now()
+            self.last_update = time.monotonic()
             logger.info(f"Refreshed {len(self.pools)} pools")
         except Exception as e:
             logger.error(f"Refresh failed: {e}")
@@ -156,23 +222,39 @@ class PoolManager:
                 if not self._load_cache():
                     raise RuntimeError("No pool data available")
 
-    def _update_liquidity_history(self, previous: Dict[str, PoolInfo], current: List[PoolInfo]):
+    def _rebuild_indices(self) -> None:
+        """Rebuild address, mint and pair lookups for the current pool set"""
+        self._by_address = {p.poolAddress: p for p in self.pools}
+        by_mint = defaultdict(list)
+        pairs = set()
+        for i, pool in enumerate(self.pools):
+            a, b = pool.tokenA.mint, pool.tokenB.mint
+            by_mint[a].append(i)
+            if b != a:
+                by_mint[b].append(i)
+            pairs.add((a, b) if a < b else (b, a))
+        self._by_mint = {mint: np.array(idx, dtype=np.intp) for mint, idx in by_mint.items()}
+        self._mint_id = {mint: i for i, mint in enumerate(self._by_mint)}
+
+        n = len(self.pools)
+        self._mA = np.fromiter(
+            (self._mint_id[p.tokenA.mint] for p in self.pools), dtype=np.int32, count=n
+        )
+        self._supply = np.fromiter((p.totalSupply_f for p in self.pools), dtype=np.float64, count=n)
+        self._rA = np.fromiter((p.reserveA_f for p in self.pools), dtype=np.float64, count=n)
+        self._rB = np.fromiter((p.reserveB_f for p in self.pools), dtype=np.float64, count=n)
+        self._token_pairs = frozenset(pairs)
+
+    def _update_liquidity_history(self, current: List[PoolInfo]):
+        now = time.monotonic()
         for pool in current:
-            hist_entry = {
-                'timestamp': datetime.now(),
-                'reserveA': float(pool.tokenA.reserve),
-                'reserveB': float(pool.tokenB.reserve),
-                'liquidity': float(pool.liquidity['totalSupply'])
-            }
-            self.liquidity_history[pool.poolAddress].append(hist_entry)
-
-            if pool.poolAddress in previous:
-                prev = previous[pool.poolAddress]
-                hist_entry['change'] = {
-                    'reserveA': self._calculate_change(prev.tokenA.reserve, pool.tokenA.reserve),
-                    'reserveB': self._calculate_change(prev.tokenB.reserve, pool.tokenB.reserve),
-                    'liquidity': self._calculate_change(prev.liquidity['totalSupply'], pool.liquidity['totalSupply'])
-                }
+            ring, count = self.liquidity_history.get(pool.poolAddress) or (
+                np.full((LIQUIDITY_HISTORY_SIZE, 4), -np.inf), 0
+            )
+            ring[count % LIQUIDITY_HISTORY_SIZE] = (
+                now, pool.reserveA_f, pool.reserveB_f, pool.totalSupply_f
+            )
+            self.liquidity_history[pool.poolAddress] = (ring, count + 1)
 
     def calculate_price_impact(self, pool: PoolInfo, amount_in: float, token_mint: str) -> float:
         """Calculate price impact for a potential trade"""
@@ -183,8 +265,8 @@ class PoolManager:
 
     def calculate_depth(self, pool: PoolInfo, depth_percent: float = 1.0) -> Dict[str, float]:
         """Calculate market depth for ±depth_percent price changes"""
-        reserveA = float(pool.tokenA.reserve)
-        reserveB = float(pool.tokenB.reserve)
+        reserveA = pool.reserveA_f
+        reserveB = pool.reserveB_f
         k = reserveA * reserveB
 
         price = reserveB / reserveA if reserveA > 0 else 0
@@ -197,42 +279,64 @@ class PoolManager:
             'current_price': price
         }
 
+    def calculate_price_impact_batch(self,
+                                     amount_in: float,
+                                     token_mint: str) -> Tuple[List[PoolInfo], np.ndarray]:
+        """Price impact of amount_in in every pool holding token_mint, in one vectorized pass"""
+        idx = self._by_mint.get(token_mint, _NO_POOLS)
+        is_token_a = self._mA[idx] == self._mint_id.get(token_mint, -1)
+        reserve = np.where(is_token_a, self._rA[idx], self._rB[idx])
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            impact = np.where(reserve == 0, np.inf, (amount_in / (reserve + amount_in)) * 100)
+        return [self.pools[i] for i in idx], impact
+
+    def calculate_depth_batch(self, depth_percent: float = 1.0) -> Dict[str, np.ndarray]:
+        """calculate_depth for every pool at once; arrays are aligned with self.pools"""
+        k = self._rA * self._rB
+        price = np.divide(self._rB, self._rA, out=np.zeros_like(self._rB), where=self._rA > 0)
+        upper_price = price * (1 + depth_percent/100)
+        lower_price = price * (1 - depth_percent/100)
+
+        # Non-positive target prices have zero depth, as in _calculate_depth_at_price
+        return {
+            'depth_upper': np.sqrt(k * np.maximum(upper_price, 0)),
+            'depth_lower': np.sqrt(k * np.maximum(lower_price, 0)),
+            'current_price': price
+        }
+
     def liquidity_change(self, pool_address: str, window: Optional[timedelta] = None) -> Dict:
         """Calculate liquidity changes over specified window"""
         window = window or self.liquidity_window
-        history = self.liquidity_history.get(pool_address, [])
+        if pool_address not in self.liquidity_history:
+            return {'error': 'Insufficient data'}
 
-        relevant = [entry for entry in history
-                   if datetime.now() - entry['timestamp'] <= window]
+        ring, _ = self.liquidity_history[pool_address]
+        timestamps = ring[:, 0]
+        cutoff = time.monotonic() - window.total_seconds()
+        relevant = np.flatnonzero(timestamps >= cutoff)
 
         if len(relevant) < 2:
             return {'error': 'Insufficient data'}
 
-        oldest = relevant[0]
-        latest = relevant[-1]
+        # The ring wraps, so locate the endpoints by timestamp rather than position
+        oldest = ring[relevant[timestamps[relevant].argmin()]]
+        latest = ring[relevant[timestamps[relevant].argmax()]]
 
         return {
-            'reserveA': self._percent_change(oldest['reserveA'], latest['reserveA']),
-            'reserveB': self._percent_change(oldest['reserveB'], latest['reserveB']),
-            'liquidity': self._percent_change(oldest['liquidity'], latest['liquidity']),
+            'reserveA': self._percent_change(float(oldest[1]), float(latest[1])),
+            'reserveB': self._percent_change(float(oldest[2]), float(latest[2])),
+            'liquidity': self._percent_change(float(oldest[3]), float(latest[3])),
             'time_window': str(window)
         }
 
     def _get_reserve(self, pool: PoolInfo, token_mint: str) -> float:
         if pool.tokenA.mint == token_mint:
-            return float(pool.tokenA.reserve)
+            return pool.reserveA_f
         elif pool.tokenB.mint == token_mint:
-            return float(pool.tokenB.reserve)
+            return pool.reserveB_f
         raise ValueError("Token not found in pool")
 
-    def _calculate_change(self, old: str, new: str) -> Dict:
-        old_val = float(old)
-        new_val = float(new)
-        return {
-            'absolute': new_val - old_val,
-            'percent': self._percent_change(old_val, new_val)
-        }
-
     @staticmethod
     def _percent_change(old: float, new: float) -> float:
         if old == 0:
@@ -252,22 +356,23 @@ class PoolManager:
                  min_liquidity: float = 0) -> List[PoolInfo]:
         self.refresh_pools()
 
-        return [
-            pool for pool in self.pools
-            if (not base_mint or pool.tokenA.mint == base_mint or pool.tokenB.mint == base_mint)
-            and (not quote_mint or pool.tokenA.mint == quote_mint or pool.tokenB.mint == quote_mint)
-            and (float(pool.liquidity["totalSupply"]) >= min_liquidity)
-        ]
+        if base_mint or quote_mint:
+            candidates = None
+            for mint in filter(None, (base_mint, quote_mint)):
+                hits = self._by_mint.get(mint, _NO_POOLS)
+                candidates = hits if candidates is None else np.intersect1d(
+                    candidates, hits, assume_unique=True
+                )
+            matches = candidates[self._supply[candidates] >= min_liquidity]
+        else:
+            matches = np.flatnonzero(self._supply >= min_liquidity)
+
+        return [self.pools[i] for i in matches]
 
     def get_token_pairs(self) -> List[Tuple[str, str]]:
         """Get all unique token pairs with normalized ordering"""
-        pairs = set()
-        for pool in self.pools:
-            pair = tuple(sorted([pool.tokenA.mint, pool.tokenB.mint]))
-            pairs.add((pair[0], pair[1]))
-        return list(pairs)
+        return list(self._token_pairs)
 
     def get_pool_by_address(self, address: str) -> Optional[PoolInfo]:
         """Get pool by on-chain address with O(1) lookup"""
-        return next((p for p in self.pools if p.poolAddress == address), None)
-
+        return self._by_address.get(address)
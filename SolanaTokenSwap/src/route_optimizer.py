@@ -1,10 +1,22 @@
-import json
-import subprocess
-from typing import List, Dict, Optional
+import asyncio
+import time
+from collections import OrderedDict
+from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
 import heapq
+import itertools
 
-@dataclass
+from .utils import NodeWorker
+
+CONNECTED_CACHE_SIZE = 4096
+QUOTE_CACHE_SIZE = 16384
+EXPANSION_EPSILON = 1e-9
+# Share of a hop's input quoted to read the pool's near-spot price for price impact
+REFERENCE_QUOTE_FRACTION = 0.01
+
+QuoteKey = Tuple[str, str, float]
+
+@dataclass(slots=True)
 class SwapStep:
     source_mint: str
     target_mint: str
@@ -13,7 +25,7 @@ class SwapStep:
     out_amount: float
     fees: float
 
-@dataclass
+@dataclass(slots=True)
 class OptimizedRoute:
     path: List[SwapStep]
     total_input: float
@@ -22,44 +34,92 @@ class OptimizedRoute:
     price_impact: float
 
 class RouteOptimizer:
-    def __init__(self, ts_executable: str = "ts-node", rpc_endpoint: str = "https://api.mainnet-beta.solana.com"):
-        self.ts_executable = ts_executable
+    def __init__(self,
+                 ts_executable: str = "node",
+                 rpc_endpoint: str = "https://api.mainnet-beta.solana.com",
+                 worker_script: str = "typescriptRaydium/dist/worker.js",
+                 quote_ttl: float = 5.0,
+                 quote_timeout: float = 10.0,
+                 worker: Optional[NodeWorker] = None,
+                 connected_ttl: float = 900.0):
         self.rpc_endpoint = rpc_endpoint
-        self.token_registry = self._load_token_registry()
-        
-    def _load_token_registry(self) -> Dict[str, dict]:
-        """Fetch token registry from TypeScript code"""
-        result = subprocess.run(
-            [self.ts_executable, "-e", "console.log(JSON.stringify(require('./getQuotes').buildTokenMetadataMap()))"],
-            capture_output=True,
-            text=True
-        )
-        return json.loads(result.stdout)
-
-    def _get_single_quote(self, source: str, target: str, amount: float) -> Optional[dict]:
-        """Execute TypeScript getQuote function and parse result"""
-        script = f"""
-        const quote = await require('./getQuotes').getQuote({{
-            sourceTokenMint: '{source}',
-            targetTokenMint: '{target}',
-            amount: {amount},
-            rpcEndpoint: '{self.rpc_endpoint}'
-        }});
-        console.log(JSON.stringify(quote));
-        """
-        
+        self.quote_ttl = quote_ttl
+        # Matches PoolManager's refresh interval, so new pools become routable after a refresh
+        self.connected_ttl = connected_ttl
+        self.quote_timeout = quote_timeout
+        # key -> (stored_at, quote), ordered oldest store first
+        self._quote_cache: "OrderedDict[QuoteKey, Tuple[float, dict]]" = OrderedDict()
+        # mint -> (fetched_at, connected mints), least recently used first
+        self._connected_cache: "OrderedDict[str, Tuple[float, List[str]]]" = OrderedDict()
+        # One long-lived Node process serves every quote, so start-up is paid once;
+        # a worker passed in is shared with its other users and left for them to close
+        self._owns_worker = worker is None
+        self._worker = worker or NodeWorker([ts_executable, worker_script])
+        self.token_registry: Dict[str, dict] = {}
+
+    async def start(self) -> None:
+        """Spawn the Node worker and load the token registry"""
+        await self._worker.start()
+        if not self.token_registry:
+            self.token_registry = await self._load_token_registry()
+
+    async def close(self) -> None:
+        """Shut down the Node worker unless it is shared"""
+        if self._owns_worker:
+            await self._worker.close()
+
+    def invalidate_caches(self) -> None:
+        """Drop cached quotes and pool connectivity, e.g. after the pool set refreshes"""
+        self._quote_cache.clear()
+        self._connected_cache.clear()
+
+    @staticmethod
+    def _quote_key(source: str, target: str, amount: float) -> QuoteKey:
+        return (source, target, round(amount, 6))
+
+    def _cached_quote(self, key: QuoteKey) -> Optional[dict]:
+        entry = self._quote_cache.get(key)
+        if entry and time.monotonic() - entry[0] < self.quote_ttl:
+            return entry[1]
+        return None
+
+    def _store_quote(self, key: QuoteKey, quote: Optional[dict]) -> None:
+        if not quote:
+            return
+        now = time.monotonic()
+        self._quote_cache.pop(key, None)
+        # Store order is age order, so expired entries are always at the front
+        while self._quote_cache and now - next(iter(self._quote_cache.values()))[0] >= self.quote_ttl:
+            self._quote_cache.popitem(last=False)
+        while len(self._quote_cache) >= QUOTE_CACHE_SIZE:
+            self._quote_cache.popitem(last=False)
+        self._quote_cache[key] = (now, quote)
+
+    async def _load_token_registry(self) -> Dict[str, dict]:
+        """Fetch token registry from the Node worker"""
+        return await self._worker.call("token_registry")
+
+    async def _get_single_quote(self, source: str, target: str, amount: float) -> Optional[dict]:
+        """Request a single quote from the Node worker, reusing fresh cached quotes"""
+        key = self._quote_key(source, target, amount)
+        cached = self._cached_quote(key)
+        if cached:
+            return cached
         try:
-            result = subprocess.run(
-                [self.ts_executable, "-e", script],
-                capture_output=True,
-                text=True,
-                timeout=10
+            quote = await self._worker.call(
+                "quote",
+                timeout=self.quote_timeout,
+                source=source,
+                target=target,
+                amount=amount,
+                rpcEndpoint=self.rpc_endpoint
             )
-            return json.loads(result.stdout)
-        except (subprocess.TimeoutExpired, json.JSONDecodeError):
+        except (RuntimeError, asyncio.TimeoutError):
             return None
+        self._store_quote(key, quote)
+        return quote
 
-    def find_routes(self, 
+    async def find_routes(self, 
                    source_mint: str, 
                    target_mint: str, 
                    amount: float, 
@@ -67,51 +127,50 @@ class RouteOptimizer:
                    max_routes: int = 5,
                    fee_bps_threshold: int = 100) -> List[OptimizedRoute]:
         """
-        Find optimal swap routes using modified Dijkstra's algorithm with:
+        Find optimal swap routes using a best-first search over hops with:
         - Liquidity awareness
         - Fee consideration
         - Slippage estimation
         """
+        await self.start()
         viable_routes = []
-        visited = set()
-        heap = []
-        
-        direct_quote = self._get_single_quote(source_mint, target_mint, amount)
-        if direct_quote:
-            heapq.heappush(heap, (
-                -direct_quote['outputToken']['estimatedAmount'],
-                [SwapStep(
-                    source_mint=source_mint,
-                    target_mint=target_mint,
-                    pool_address=direct_quote['poolAddresses'][0],
-                    in_amount=amount,
-                    out_amount=direct_quote['outputToken']['estimatedAmount'],
-                    fees=direct_quote['fees']['tradeFee'] + direct_quote['fees']['ownerFee']
-                )]
-            ))
+        best_out: Dict[Tuple[str, int], float] = {}
+        counter = itertools.count()
+        # Heap entries are (-output, tie-breaker, path); the empty path sits at the source
+        heap = [(-amount, next(counter), [])]
 
-        for _ in range(max_hops - 1):
-            if not heap:
-                break
-                
-            current_output, current_path = heapq.heappop(heap)
-            current_token = current_path[-1].target_mint
-            current_amount = current_path[-1].out_amount
-            
-            if current_token == target_mint:
+        while heap and len(viable_routes) < max_routes:
+            _, _, current_path = heapq.heappop(heap)
+            current_token = current_path[-1].target_mint if current_path else source_mint
+            current_amount = current_path[-1].out_amount if current_path else amount
+
+            if current_path and current_token == target_mint:
                 viable_routes.append(current_path)
                 continue
-                
-            if current_token in visited:
+
+            hops = len(current_path)
+            if hops >= max_hops:
                 continue
-                
-            visited.add(current_token)
-            
-            for token in self._get_connected_tokens(current_token):
-                quote = self._get_single_quote(current_token, token, current_amount)
+
+            # Re-expand a token at the same depth only when this path reaches it with more output
+            best = best_out.get((current_token, hops))
+            if best is not None and current_amount <= best * (1 + EXPANSION_EPSILON):
+                continue
+            best_out[(current_token, hops)] = current_amount
+
+            on_path = {source_mint, *(step.target_mint for step in current_path)}
+            connected = [
+                t for t in await self._get_connected_tokens(current_token) if t not in on_path
+            ]
+            # Every hop out of this token is quoted concurrently on the worker
+            quotes = await asyncio.gather(*[
+                self._get_single_quote(current_token, token, current_amount)
+                for token in connected
+            ])
+            for token, quote in zip(connected, quotes):
                 if not quote or quote['fees']['tradeFee'] > fee_bps_threshold:
                     continue
-                
+
                 new_path = current_path + [SwapStep(
                     source_mint=current_token,
                     target_mint=token,
@@ -120,32 +179,30 @@ class RouteOptimizer:
                     out_amount=quote['outputToken']['estimatedAmount'],
                     fees=quote['fees']['tradeFee'] + quote['fees']['ownerFee']
                 )]
-                
+
                 heapq.heappush(heap, (
-                    -quote['outputToken']['estimatedAmount'], 
+                    -quote['outputToken']['estimatedAmount'],
+                    next(counter),
                     new_path
                 ))
 
-        return self._format_routes(viable_routes[:max_routes], amount)
+        return await self._format_routes(viable_routes, amount)
 
-    def _get_connected_tokens(self, mint: str) -> List[str]:
+    async def _get_connected_tokens(self, mint: str) -> List[str]:
         """Find tokens with direct pools to current mint"""
-        script = f"""
-        const pools = await require('./getQuotes').fetchRaydiumPools();
-        const connected = pools.filter(p => 
-            p.baseMint === '{mint}' || p.quoteMint === '{mint}'
-        ).map(p => p.baseMint === '{mint}' ? p.quoteMint : p.baseMint);
-        console.log(JSON.stringify(connected));
-        """
-        
-        result = subprocess.run(
-            [self.ts_executable, "-e", script],
-            capture_output=True,
-            text=True
-        )
-        return json.loads(result.stdout)
+        entry = self._connected_cache.get(mint)
+        if entry and time.monotonic() - entry[0] < self.connected_ttl:
+            self._connected_cache.move_to_end(mint)
+            return entry[1]
+
+        connected = await self._worker.call("connected", mint=mint, rpcEndpoint=self.rpc_endpoint)
+        self._connected_cache[mint] = (time.monotonic(), connected)
+        self._connected_cache.move_to_end(mint)
+        if len(self._connected_cache) > CONNECTED_CACHE_SIZE:
+            self._connected_cache.popitem(last=False)
+        return connected
 
-    def _format_routes(self, paths: List[List[SwapStep]], input_amount: float) -> List[OptimizedRoute]:
+    async def _format_routes(self, paths: List[List[SwapStep]], input_amount: float) -> List[OptimizedRoute]:
         routes = []
         for path in paths:
             total_output = path[-1].out_amount
@@ -156,33 +213,45 @@ class RouteOptimizer:
                 total_input=input_amount,
                 total_output=total_output,
                 total_fees=total_fees,
-                price_impact=self._calculate_price_impact(path)
+                price_impact=await self._calculate_price_impact(path)
             ))
             
         return sorted(routes, key=lambda x: x.total_output, reverse=True)
 
-    def _calculate_price_impact(self, path: List[SwapStep]) -> float:
+    async def _calculate_price_impact(self, path: List[SwapStep]) -> float:
         """Estimate cumulative price impact across multi-hop swaps"""
+        # A small reference trade barely moves the pool, so its rate approximates the spot price
+        references = await asyncio.gather(*[
+            self._get_single_quote(step.source_mint, step.target_mint, step.in_amount * REFERENCE_QUOTE_FRACTION)
+            for step in path
+        ])
+
         impact = 1.0
-        for step in path:
-            quote = self._get_single_quote(step.source_mint, step.target_mint, step.in_amount)
-            if not quote:
+        for step, reference in zip(path, references):
+            if not reference or not reference['inputToken']['amount'] or not step.in_amount:
                 continue
-                
-            fair_price = quote['outputToken']['estimatedAmount'] / quote['inputToken']['amount']
+
+            fair_price = reference['outputToken']['estimatedAmount'] / reference['inputToken']['amount']
             actual_price = step.out_amount / step.in_amount
-            impact *= (actual_price / fair_price)
-            
-        return (1 - impact) * 100 
+            if fair_price:
+                impact *= (actual_price / fair_price)
 
-if __name__ == "__main__":
+        return (1 - impact) * 100
+
+async def _find_example_routes() -> List[OptimizedRoute]:
     optimizer = RouteOptimizer()
-    routes = optimizer.find_routes(
-        source_mint="So11111111111111111111111111111111111111112",  # SOL
-        target_mint="EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v",  # USDC
-        amount=1.0,
-        max_hops=3
-    )
+    try:
+        return await optimizer.find_routes(
+            source_mint="So11111111111111111111111111111111111111112",  # SOL
+            target_mint="EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v",  # USDC
+            amount=1.0,
+            max_hops=3
+        )
+    finally:
+        await optimizer.close()
+
+if __name__ == "__main__":
+    routes = asyncio.run(_find_example_routes())
     
     for i, route in enumerate(routes[:3]):
         print(f"Route #{i+1}")
@@ -1,25 +1,76 @@
-import json
+import asyncio
 import logging
-import subprocess
 import base64
 import hmac
 import hashlib
 import os
 import time
 import random
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Dict, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+import httpx
+import hyperscan
+import numpy as np
+import orjson
 from solana.rpc.async_api import AsyncClient
 from solana.rpc.commitment import Confirmed
-from solana.transaction import Transaction, VersionedTransaction
-from solana.publickey import PublicKey
+from solana.rpc.types import TxOpts
+from solana.exceptions import SolanaRpcException
+from solders.pubkey import Pubkey
 from solders.signature import Signature
+from solders.transaction import VersionedTransaction
+
+from .utils import NodeWorker, retry_async
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Prepared swaps expire after 60s on the TypeScript side; keep nonces a while longer
+MAX_NONCE_AGE = 300.0
+MAX_NONCES = 100_000
+# Providers throttle or reject very large JSON-RPC batches; many small ones parallelize better
+RPC_BATCH_SIZE = 20
+RECENT_SWAP_LIMIT = 20
+# Only swaps this recent can be part of a sandwich around ours; older ones are not fetched
+RECENT_SWAP_WINDOW = 30.0
+# Concurrent swaps on one pair share a price read made within this window
+PRICE_CACHE_TTL = 0.25
+# HTTP/2 multiplexes concurrent calls over each connection; a couple more cover a stalled one
+RPC_MAX_CONNECTIONS = 4
+RPC_KEEPALIVE_EXPIRY = 300.0
+RPC_TIMEOUT = 10.0
+SEND_ATTEMPTS = 3
+JITO_ENDPOINT = "https://jito-mainnet.solana.com"
+# Wrapped SOL, USDC and USDT
+COMMON_MINTS = (
+    "So11111111111111111111111111111111111111112",
+    "EPjFWdd5AufqSSqeM2qJxekFRYTMCKzAs7QVdw8q1JVf",
+    "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB"
+)
+
+# Simulation log signatures of bundled or back-running activity, by label
+MEV_LOG_PATTERNS = {
+    "jito_tip": rb"Program T1pyyaTNZsKv2WcRAB8oVnk93mLJw2XzjtVYqCsaHqt invoke",
+    "arbitrage": rb"Program log: Instruction: (?:Arbitrage|Backrun|RouteArb)",
+    "flash_loan": rb"Program log: Instruction: Flash(?:Loan|Borrow|Repay)"
+}
+_MEV_LABELS = list(MEV_LOG_PATTERNS)
+
+# Every pattern is matched in one pass over the logs instead of one search per pattern
+_MEV_DB = hyperscan.Database()
+_MEV_DB.compile(
+    expressions=list(MEV_LOG_PATTERNS.values()),
+    ids=list(range(len(_MEV_LABELS))),
+    elements=len(_MEV_LABELS),
+    flags=[hyperscan.HS_FLAG_SINGLEMATCH | hyperscan.HS_FLAG_DOTALL | hyperscan.HS_FLAG_UTF8] * len(_MEV_LABELS)
+)
+# Scratch space is not thread-safe, and analysis runs on a thread pool
+_mev_scratch = threading.local()
+
+@dataclass(slots=True)
 class SwapParams:
     source_mint: str
     target_mint: str
@@ -30,162 +81,616 @@ class SwapParams:
     mev_protection: bool = True
     privacy_level: int = 1
 
-@dataclass
+@dataclass(slots=True)
 class SwapInstructions:
-    transaction: VersionedTransaction
+    # Wire-format transaction exactly as built by the worker. It is not signed yet:
+    # nothing here adds the wallet signature before it is sent.
+    transaction: bytes
     recent_blockhash: str
     compute_units: int
     quote_id: str
     expires_at: int
     expected_out: int
+    # AMM the swap trades against; pool swaps reference it, unlike the mint accounts
+    pool_address: str
+
+@dataclass(slots=True)
+class RecentSwap:
+    signature: str
+    amount: int
+
+@dataclass(slots=True)
+class PriceSource:
+    """On-chain price account and the decoder that reads a price from its data"""
+    account: str
+    decode: Callable[[bytes], float]
+    weight: float = 1.0
+
+class SwapBatcher:
+    """Coalesces prepare requests into one prepare_batch round trip to the Node worker"""
+
+    def __init__(self, worker: NodeWorker, max_batch_size: int, flush_interval_ms: float):
+        self._worker = worker
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._flushes = set()
+
+    async def submit(self, request: Dict) -> Dict:
+        """Queue one prepare request and wait for its signed response"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request["nonce"]] = future
+        await self._queue.put(request)
+        return await future
+
+    async def close(self) -> None:
+        """Stop draining and cancel requests still waiting on a batch"""
+        if self._task is not None:
+            self._task.cancel()
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+
+    async def _run(self) -> None:
+        """Drain the queue every flush interval or as soon as a batch is full"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            # Dispatch without waiting so the next batch can fill while this one is in flight
+            flush = asyncio.create_task(self._flush(batch))
+            self._flushes.add(flush)
+            flush.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: List[Dict]) -> None:
+        try:
+            results = await self._worker.call("prepare_batch", items=batch)
+        except Exception as e:
+            for request in batch:
+                future = self._pending.pop(request["nonce"], None)
+                if future and not future.done():
+                    future.set_exception(e)
+            return
+
+        for result in results:
+            future = self._pending.pop(result["nonce"], None)
+            if future is None or future.done():
+                continue
+            if result.get("error"):
+                future.set_exception(RuntimeError(f"Worker request failed: {result['error']}"))
+            else:
+                future.set_result(result)
+
+        # A request the worker did not answer would otherwise wait forever
+        for request in batch:
+            future = self._pending.pop(request["nonce"], None)
+            if future and not future.done():
+                future.set_exception(RuntimeError("Swap preparation missing from batch response"))
 
 class TransactionManager:
-    def __init__(self, wallet_path: str, hmac_secret: str):
-        self.client = AsyncClient()
+    def __init__(self,
+                 wallet_path: str,
+                 hmac_secret: str,
+                 worker_command: Tuple[str, ...] = ("node", "typescriptRaydium/dist/worker.js"),
+                 max_batch_size: int = 1,
+                 flush_interval_ms: float = 5.0,
+                 rpc_endpoint: str = "https://api.mainnet-beta.solana.com",
+                 worker: Optional[NodeWorker] = None):
+        # One HTTP/2 session shared by every RPC path, so requests reuse warm TLS connections
+        self._http = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=RPC_MAX_CONNECTIONS,
+                max_keepalive_connections=RPC_MAX_CONNECTIONS,
+                keepalive_expiry=RPC_KEEPALIVE_EXPIRY
+            ),
+            timeout=RPC_TIMEOUT
+        )
+        # Raw JSON-RPC for batched reads that solana-py would send one POST at a time
+        self.rpc_endpoint = rpc_endpoint
+        # Sessions the solana-py providers built for themselves, closed once a loop is available
+        self._replaced_sessions: List[httpx.AsyncClient] = []
+        self.client = self._share_session(AsyncClient(rpc_endpoint, timeout=RPC_TIMEOUT))
+        # Swaps are prepared by one persistent Node process instead of a spawn per call;
+        # a worker passed in is shared with its other users and left for them to close
+        self._owns_worker = worker is None
+        self._worker = worker or NodeWorker(list(worker_command))
+        # A batch size of 1 sends each prepare on its own, as before
+        self._batcher = (
+            SwapBatcher(self._worker, max_batch_size, flush_interval_ms)
+            if max_batch_size > 1 else None
+        )
+        # Simulation analysis runs here so log scanning never stalls the event loop
+        self._cpu_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="swap-analysis")
         self.hmac_secret = hmac_secret
-        self.nonces = set()
+        # OS-backed randomness, so MEV timing jitter is not predictable
+        self._rng = random.SystemRandom()
+        # Keyed once; each verification copies this instead of redoing the key schedule
+        self._hmac_template = hmac.new(hmac_secret.encode(), b"", hashlib.sha512)
+        # (source_mint, target_mint) -> oracle/DEX accounts consulted for the current price
+        self.price_sources: Dict[Tuple[str, str], List[PriceSource]] = {}
+        self._price_cache: Dict[Tuple[str, str], asyncio.Future] = {}
+        # Mints confirmed to exist on chain; their account lookups drop out of the MEV batch
+        self._known_mints = set()
+        # nonce -> monotonic expiry; insertion order is expiry order, so eviction is O(1)
+        self.nonces: "OrderedDict[str, float]" = OrderedDict()
         self.wallet = self._load_secure_wallet(wallet_path)
-        self.jito_client = AsyncClient("https://jito-mainnet.solana.com") if os.getenv("JITO_ENABLED") else None
+        # solders Pubkey, the type of transaction account keys; a legacy PublicKey never compares equal
+        self._wallet_pubkey = Pubkey.from_string(str(self.wallet.public_key))
+        self.jito_client = (
+            self._share_session(AsyncClient(JITO_ENDPOINT, timeout=RPC_TIMEOUT))
+            if os.getenv("JITO_ENABLED") else None
+        )
+        # Constructed inside a running loop, cold-start costs are paid before the first swap
+        try:
+            self._warmup_task = asyncio.get_running_loop().create_task(self._warmup())
+        except RuntimeError:
+            self._warmup_task = None
+
+    async def start(self) -> None:
+        """Warm the worker and RPC connections if construction happened outside the loop"""
+        if self._warmup_task is None:
+            self._warmup_task = asyncio.create_task(self._warmup())
+        await self._warmup_task
+
+    async def _warmup(self) -> None:
+        """Start the worker, open the RPC connections and confirm the common mints"""
+        await self._close_replaced_sessions()
+        results = await asyncio.gather(
+            self._worker.call("noop"),
+            self.client.get_version(),
+            self.client.get_latest_blockhash(),
+            self._rpc_batch([
+                ("getMultipleAccounts", [list(COMMON_MINTS), {"encoding": "base64", "dataSlice": {"offset": 0, "length": 0}}])
+            ]),
+            return_exceptions=True
+        )
+        # Warmup is best effort; a failed step is simply paid again by the first swap
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning(f"Warmup step failed: {result}")
+
+        mint_accounts = results[-1]
+        if not isinstance(mint_accounts, Exception):
+            self._known_mints.update(
+                mint for mint, account in zip(COMMON_MINTS, mint_accounts[0]["value"]) if account is not None
+            )
+
+    def _share_session(self, client: AsyncClient) -> AsyncClient:
+        """Route a solana-py client through the shared HTTP/2 session"""
+        # solana-py has no public hook for supplying a session, so the provider's private
+        # one is swapped out. The provider posts to its absolute endpoint URL, so one
+        # session can serve every host. Closing the old session is async and waits for
+        # warmup or close().
+        self._replaced_sessions.append(client._provider.session)
+        client._provider.session = self._http
+        return client
+
+    async def _close_replaced_sessions(self) -> None:
+        """Close the sessions the providers created before they were shared"""
+        sessions, self._replaced_sessions = self._replaced_sessions, []
+        await asyncio.gather(*(session.aclose() for session in sessions), return_exceptions=True)
 
     async def prepare_swap(self, params: SwapParams) -> SwapInstructions:
         """Enhanced swap preparation with security features"""
-        nonce = os.urandom(16).hex()
-        self.nonces.add(nonce)
+        nonce = self._issue_nonce()
+
+        request = {
+            "sourceTokenMint": params.source_mint,
+            "targetTokenMint": params.target_mint,
+            "amount": params.amount,
+            "slippage": params.slippage,
+            "userPublicKey": params.user_pubkey,
+            "rpcEndpoint": params.rpc_endpoint,
+            "nonce": nonce,
+            # The worker adds the obfuscating dummy instruction while it builds the message
+            "mevProtection": params.mev_protection
+        }
 
         try:
-            proc = subprocess.run(
-                [
-                    "ts-node", "swap.ts",
-                    "prepare",
-                    params.source_mint,
-                    params.target_mint,
-                    str(params.amount),
-                    str(params.slippage),
-                    params.user_pubkey,
-                    params.rpc_endpoint,
-                    nonce
-                ],
-                capture_output=True,
-                check=True,
-                text=True
-            )
-
-            response = self._validate_swap_response(proc.stdout, nonce)
-            instructions = self._parse_swap_response(response['data'])
+            if self._batcher:
+                signed = await self._batcher.submit(request)
+            else:
+                signed = await self._worker.call("prepare", **request)
+        except RuntimeError as e:
+            logger.error(f"Swap preparation failed: {e}")
+            raise
 
-            # Add MEV protection parameters
-            instructions = self._apply_mev_protection(instructions, params)
+        response = self._validate_swap_response(signed["sig"], signed["payload"].encode(), nonce)
+        return self._parse_swap_response(response)
+
+    async def close(self) -> None:
+        """Shut down the swap batcher, the Node worker, the RPC session and the analysis pool"""
+        if self._warmup_task and not self._warmup_task.done():
+            self._warmup_task.cancel()
+        if self._batcher:
+            await self._batcher.close()
+        if self._owns_worker:
+            await self._worker.close()
+        await self._close_replaced_sessions()
+        await self._http.aclose()
+        self._cpu_pool.shutdown(wait=False)
+
+    async def _rpc_batch(self,
+                         calls: List[Tuple[str, list]],
+                         endpoint: Optional[str] = None,
+                         raise_errors: bool = True) -> List[Any]:
+        """Send JSON-RPC calls as batch requests of at most RPC_BATCH_SIZE, results in call order
+
+        With raise_errors off, a failed call yields its exception in place of a result,
+        so one bad call does not hide the outcome of the others.
+        """
+        endpoint = endpoint or self.rpc_endpoint
+        requests = [
+            {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+            for i, (method, params) in enumerate(calls)
+        ]
+        chunks = [requests[i:i + RPC_BATCH_SIZE] for i in range(0, len(requests), RPC_BATCH_SIZE)]
+        responses = await asyncio.gather(
+            *(self._post_batch(endpoint, chunk) for chunk in chunks),
+            return_exceptions=not raise_errors
+        )
 
-            return instructions
+        results: Dict[int, Any] = {}
+        for chunk, response in zip(chunks, responses):
+            if isinstance(response, Exception):
+                results.update((request["id"], response) for request in chunk)
+            else:
+                results.update(self._match_batch_response(calls, chunk, response))
+
+        missing = RuntimeError("No response to RPC call in batch")
+        ordered = [results.get(i, missing) for i in range(len(calls))]
+        if raise_errors:
+            for result in ordered:
+                if isinstance(result, Exception):
+                    raise result
+        return ordered
+
+    @staticmethod
+    def _match_batch_response(calls: List[Tuple[str, list]], chunk: List[Dict], body: Any) -> Dict[int, Any]:
+        """Map one batch response body to its calls by id; errors come back as exceptions"""
+        ids = {request["id"] for request in chunk}
+        # Providers without batch support answer the whole batch with a single error object
+        if not isinstance(body, list):
+            detail = body.get("error", body) if isinstance(body, dict) else body
+            return dict.fromkeys(ids, RuntimeError(f"RPC batch rejected: {detail}"))
+
+        # Batch responses may come back in any order; only the id ties them to a call
+        matched: Dict[int, Any] = {}
+        unmatched = None
+        for item in body:
+            call_id = item.get("id") if isinstance(item, dict) else None
+            if not isinstance(call_id, int) or call_id not in ids:
+                # An error with a null id (e.g. the batch failed to parse) belongs to no single call
+                detail = item.get("error", item) if isinstance(item, dict) else item
+                unmatched = RuntimeError(f"RPC batch error: {detail}")
+            elif "error" in item:
+                matched[call_id] = RuntimeError(f"RPC {calls[call_id][0]} failed: {item['error']}")
+            else:
+                matched[call_id] = item.get("result")
+
+        if unmatched is not None:
+            matched.update((call_id, unmatched) for call_id in ids - matched.keys())
+        return matched
+
+    async def _post_batch(self, endpoint: str, chunk: List[Dict]) -> List[Dict]:
+        response = await self._http.post(endpoint, content=orjson.dumps(chunk),
+                                         headers={"Content-Type": "application/json"})
+        response.raise_for_status()
+        return orjson.loads(response.content)
+
+    def _issue_nonce(self) -> str:
+        """Create a nonce, dropping expired ones and capping the store at MAX_NONCES"""
+        now = time.monotonic()
+        while self.nonces and next(iter(self.nonces.values())) < now:
+            self.nonces.popitem(last=False)
 
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Swap preparation failed: {e.stderr}")
-            raise
+        nonce = os.urandom(16).hex()
+        self.nonces[nonce] = now + MAX_NONCE_AGE
+        if len(self.nonces) > MAX_NONCES:
+            self.nonces.popitem(last=False)
+        return nonce
 
     async def execute_swap(self, instructions: SwapInstructions, params: SwapParams) -> Signature:
         """Secure swap execution with enhanced protections"""
+        self._verify_transaction(instructions.transaction)
+
         # MEV protection measures
         await self._mev_checks(instructions, params)
 
         # Randomized delay for front-running protection
         if params.mev_protection:
-            delay = random.uniform(0.1, 0.5)
-            time.sleep(delay)
+            delay = self._rng.uniform(0.1, 0.5)
+            await asyncio.sleep(delay)
 
         # Private transaction routing
         if params.privacy_level > 1 and self.jito_client:
-            return await self.jito_client.send_transaction(
-                instructions.transaction,
-                opts=TxOpts(skip_preflight=True)
-            )
+            return await self._send_transaction(self.jito_client, instructions.transaction, skip_preflight=True)
 
         # Standard execution
-        return await self.client.send_transaction(
-            instructions.transaction,
-            opts=TxOpts(skip_preflight=False)
+        return await self._send_transaction(self.client, instructions.transaction, skip_preflight=False)
+
+    async def execute_swaps(self,
+                            items: List[Tuple[SwapInstructions, SwapParams]]) -> List[Union[Signature, Exception]]:
+        """Execute several prepared swaps; one signature or exception per swap, in input order"""
+        outcomes: List[Union[Signature, Exception]] = []
+        for instructions, _ in items:
+            try:
+                outcomes.append(self._verify_transaction(instructions.transaction).signatures[0])
+            except Exception as e:
+                outcomes.append(e)
+
+        verified = [i for i, outcome in enumerate(outcomes) if not isinstance(outcome, Exception)]
+        checks = await asyncio.gather(
+            *(self._mev_checks(*items[i]) for i in verified),
+            return_exceptions=True
         )
+        for i, check in zip(verified, checks):
+            if isinstance(check, Exception):
+                outcomes[i] = check
+        ready = [i for i in verified if not isinstance(outcomes[i], Exception)]
+
+        # One shared jitter window for the batch rather than one per swap
+        if any(items[i][1].mev_protection for i in ready):
+            await asyncio.sleep(self._rng.uniform(0.1, 0.5))
+
+        private, standard = [], []
+        for i in ready:
+            (private if items[i][1].privacy_level > 1 and self.jito_client else standard).append(i)
+
+        def encode(i: int) -> str:
+            return base64.b64encode(items[i][0].transaction).decode()
+
+        # Each private swap is its own bundle; bundles are all-or-nothing, so independent
+        # swaps must not share one
+        sent, bundled = await asyncio.gather(
+            self._rpc_batch([
+                ("sendTransaction", [encode(i), {"encoding": "base64", "skipPreflight": False}])
+                for i in standard
+            ], raise_errors=False),
+            self._rpc_batch([
+                ("sendBundle", [[encode(i)], {"encoding": "base64"}])
+                for i in private
+            ], endpoint=f"{JITO_ENDPOINT}/api/v1/bundles", raise_errors=False)
+        )
+
+        # On success the transaction's own first signature identifies the swap; bundle
+        # calls only return bundle ids
+        for i, result in zip(standard + private, sent + bundled):
+            if isinstance(result, Exception):
+                outcomes[i] = result
+        return outcomes
+
+    @retry_async(attempts=SEND_ATTEMPTS, exceptions=(httpx.TransportError, SolanaRpcException))
+    async def _send_transaction(self, client: AsyncClient, raw: bytes, skip_preflight: bool) -> Signature:
+        """Send a transaction, retrying transient transport failures with backoff"""
+        # Resending the same signed transaction is idempotent; the cluster dedupes by signature
+        return await client.send_raw_transaction(raw, opts=TxOpts(skip_preflight=skip_preflight))
+
+    def _verify_transaction(self, raw: bytes) -> VersionedTransaction:
+        """Ensure the prepared transaction actually involves our wallet"""
+        tx = VersionedTransaction.from_bytes(raw)
+        if self._wallet_pubkey not in tx.message.account_keys:
+            raise self.SecurityError("Wallet is not part of the prepared transaction")
+        return tx
 
     async def _mev_checks(self, instructions: SwapInstructions, params: SwapParams):
         """Multi-layered MEV protection"""
-        # Real-time slippage check
-        current_price = await self._get_current_price(
-            params.source_mint,
-            params.target_mint
+        # Price and chain-state lookups are independent, so their round trips overlap
+        current_price, recent_swaps = await asyncio.gather(
+            self._get_current_price(params.source_mint, params.target_mint),
+            self._check_chain_state(instructions, params)
         )
 
+        # Real-time slippage check
         acceptable_slippage = params.slippage * (2 if params.mev_protection else 1)
         if current_price > instructions.expected_out * (1 + acceptable_slippage/100):
-            raise MEVError("Market conditions changed significantly")
+            raise self.MEVError("Market conditions changed significantly")
 
         # Sandwich attack detection
-        recent_swaps = await self._get_recent_swaps(params.source_mint)
         if self._detect_sandwich_attack(recent_swaps, params.amount):
-            raise MEVError("Potential sandwich attack detected")
+            raise self.MEVError("Potential sandwich attack detected")
+
+    async def _check_chain_state(self, instructions: SwapInstructions, params: SwapParams) -> List[RecentSwap]:
+        """Validate the blockhash and mints, then load recent swaps through the pool"""
+        unknown_mints = [m for m in (params.source_mint, params.target_mint) if m not in self._known_mints]
+
+        # Chain state needed by the remaining checks, fetched in one round trip
+        signatures, blockhash_status, *mint_accounts = await self._rpc_batch([
+            ("getSignaturesForAddress", [instructions.pool_address, {"limit": RECENT_SWAP_LIMIT}]),
+            ("isBlockhashValid", [instructions.recent_blockhash, {"commitment": "processed"}]),
+            *(
+                ("getAccountInfo", [mint, {"encoding": "base64", "dataSlice": {"offset": 0, "length": 0}}])
+                for mint in unknown_mints
+            )
+        ])
+        if not blockhash_status["value"]:
+            raise self.SecurityError("Prepared transaction blockhash has expired")
+        if any(account["value"] is None for account in mint_accounts):
+            raise self.SecurityError("Swap token mint account not found")
+        self._known_mints.update(unknown_mints)
+
+        cutoff = time.time() - RECENT_SWAP_WINDOW
+        recent = [s for s in signatures if s.get("err") is None and (s.get("blockTime") or 0) >= cutoff]
+        return await self._get_recent_swaps(params.source_mint, recent)
+
+    async def _get_recent_swaps(self, mint: str, signatures: List[Dict]) -> List[RecentSwap]:
+        """Amounts of a mint moved by the given recent transactions"""
+        transactions = await self._rpc_batch([
+            ("getTransaction", [s["signature"], {"encoding": "json", "maxSupportedTransactionVersion": 0}])
+            for s in signatures
+        ])
+
+        swaps = []
+        for tx in transactions:
+            if not tx or not tx.get("meta"):
+                continue
+            meta = tx["meta"]
+            pre = {
+                b["accountIndex"]: int(b["uiTokenAmount"]["amount"])
+                for b in meta.get("preTokenBalances") or [] if b["mint"] == mint
+            }
+            moved = [
+                abs(int(b["uiTokenAmount"]["amount"]) - pre.get(b["accountIndex"], 0))
+                for b in meta.get("postTokenBalances") or [] if b["mint"] == mint
+            ]
+            if moved:
+                swaps.append(RecentSwap(tx["transaction"]["signatures"][0], max(moved)))
+        return swaps
 
     def _detect_sandwich_attack(self, recent_swaps: list, amount: int) -> bool:
         """Detect potential sandwich attack patterns"""
-        similar_swaps = [s for s in recent_swaps if 0.9*amount < s.amount < 1.1*amount]
-        return len(similar_swaps) >= 2
+        # The window is at most RECENT_SWAP_LIMIT swaps, too few for an array pass to pay off
+        low, high = 0.9 * amount, 1.1 * amount
+        return sum(1 for s in recent_swaps if low < s.amount < high) >= 2
+
+    def register_price_source(self, source_mint: str, target_mint: str, source: PriceSource) -> None:
+        """Add an oracle or pool account to the price check for a token pair"""
+        self.price_sources.setdefault((source_mint, target_mint), []).append(source)
 
     async def _get_current_price(self, source_mint: str, target_mint: str) -> float:
-        """Real-time price check from multiple sources"""
-        # Implementation would query multiple DEXs/price oracles
-        return await self._weighted_price_check(source_mint, target_mint)
+        """Real-time price check from multiple sources, coalescing concurrent lookups per pair"""
+        key = (source_mint, target_mint)
+        future = self._price_cache.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._weighted_price_check(source_mint, target_mint))
+            self._price_cache[key] = future
+            future.add_done_callback(lambda f: self._schedule_price_eviction(key, f))
+        # Shielded so one cancelled caller does not cancel the read for everyone sharing it
+        return await asyncio.shield(future)
+
+    def _schedule_price_eviction(self, key: Tuple[str, str], future: asyncio.Future) -> None:
+        """Expire a settled price after PRICE_CACHE_TTL; failures are dropped at once"""
+        def evict():
+            if self._price_cache.get(key) is future:
+                del self._price_cache[key]
+
+        if future.cancelled() or future.exception() is not None:
+            evict()
+        else:
+            asyncio.get_running_loop().call_later(PRICE_CACHE_TTL, evict)
+
+    async def _weighted_price_check(self, source_mint: str, target_mint: str) -> float:
+        """Weighted mean price over every registered source, read in a single RPC call"""
+        sources = self.price_sources.get((source_mint, target_mint))
+        if not sources:
+            raise self.SecurityError(f"No price sources registered for {source_mint} -> {target_mint}")
+
+        (accounts,) = await self._rpc_batch([
+            ("getMultipleAccounts", [[s.account for s in sources], {"encoding": "base64"}])
+        ])
+
+        prices, weights = [], []
+        for source, account in zip(sources, accounts["value"]):
+            if account is None:
+                logger.warning(f"Price account {source.account} not found")
+                continue
+            try:
+                prices.append(source.decode(base64.b64decode(account["data"][0])))
+            except Exception as e:
+                logger.warning(f"Failed to decode price account {source.account}: {e}")
+                continue
+            weights.append(source.weight)
+
+        if not prices:
+            raise self.SecurityError(f"No usable price for {source_mint} -> {target_mint}")
+        return float(np.average(np.asarray(prices), weights=np.asarray(weights)))
 
     async def simulate_swap(self, instructions: SwapInstructions) -> Dict:
         """Advanced transaction simulation"""
         try:
             sim_result = await self.client.simulate_transaction(
-                instructions.transaction,
+                VersionedTransaction.from_bytes(instructions.transaction),
                 commitment=Confirmed,
                 replace_recent_blockhash=True
             )
 
             if sim_result.value.err:
-                raise SimulationError("Transaction simulation failed")
+                raise self.SimulationError("Transaction simulation failed")
 
-            return self._analyze_simulation(sim_result)
+            return await asyncio.get_running_loop().run_in_executor(
+                self._cpu_pool, self._analyze_simulation, sim_result
+            )
         except Exception as e:
-            raise SimulationError(f"Simulation error: {str(e)}")
+            raise self.SimulationError(f"Simulation error: {str(e)}")
 
     def _analyze_simulation(self, sim_result) -> Dict:
         """Analyze simulation results for anomalies"""
         return {
             "compute_units": sim_result.value.units_consumed,
-            "price_impact": self._calculate_price_impact(sim_result),
             "potential_mev": self._detect_mev_patterns(sim_result)
         }
 
-    def _apply_mev_protection(self, instructions: SwapInstructions, params: SwapParams):
-        """Adjust transaction parameters for MEV protection"""
-        if params.mev_protection:
-            # Obfuscate transaction size
-            instructions.transaction.message.instructions[0].data += bytes(random.randint(0,255))
+    def _detect_mev_patterns(self, sim_result) -> List[str]:
+        """Labels of the MEV log signatures present in a simulation"""
+        scratch = getattr(_mev_scratch, "scratch", None)
+        if scratch is None:
+            scratch = _mev_scratch.scratch = hyperscan.Scratch(_MEV_DB)
 
-            # Add dummy instructions
-            instructions.transaction.message.instructions.insert(
-                0, self._create_dummy_instruction()
-            )
+        matched = set()
 
-        return instructions
+        def on_match(pattern_id, start, end, flags, context):
+            matched.add(pattern_id)
 
-    def _create_dummy_instruction(self):
-        """Create a dummy instruction for transaction obfuscation"""
-        # Implementation would create a valid but no-op instruction
-        return TransactionInstruction(
-            keys=[],
-            program_id=PublicKey("11111111111111111111111111111111"),
-            data=bytes()
-        )
+        _MEV_DB.scan("\n".join(sim_result.value.logs or []).encode(),
+                     match_event_handler=on_match, scratch=scratch)
+        return [_MEV_LABELS[i] for i in sorted(matched)]
 
     # Existing security methods from previous implementation
-    def _validate_response(self, data: Dict, signature: str) -> bool:
+    def _validate_swap_response(self, signature: str, payload: bytes, nonce: str) -> Dict:
+        """Verify the signed payload exactly as emitted, then parse it and check the nonce"""
+        if not self._validate_response(payload, signature):
+            raise self.SecurityError("Invalid swap response signature")
+
+        data = orjson.loads(payload)
+        if data.get("metadata", {}).get("nonce") != nonce:
+            raise self.SecurityError("Swap response nonce mismatch")
+
+        # Single use: a replayed response finds its nonce already consumed
+        expires_at = self.nonces.pop(nonce, None)
+        if expires_at is None or expires_at < time.monotonic():
+            raise self.SecurityError("Swap response nonce unknown, expired or already used")
+        return data
+
+    def _validate_response(self, payload: bytes, signature: str) -> bool:
         """HMAC validation implementation"""
-        pass
+        try:
+            expected = bytes.fromhex(signature)
+        except ValueError:
+            return False
+        mac = self._hmac_template.copy()
+        mac.update(payload)
+        return hmac.compare_digest(mac.digest(), expected)
 
     def _parse_swap_response(self, data: Dict) -> SwapInstructions:
         """Response parsing implementation"""
-        pass
+        if data.get("status") != "success":
+            raise self.SecurityError(f"Swap preparation failed: {data.get('error')}")
+
+        swap = data["swapInstructions"]
+        metadata = data["metadata"]
+        return SwapInstructions(
+            transaction=base64.b64decode(swap["serializedTransaction"]),
+            recent_blockhash=swap["recentBlockhash"],
+            compute_units=swap["computeUnits"],
+            quote_id=metadata["quoteId"],
+            expires_at=metadata["expiresAt"],
+            expected_out=swap["expectedOut"],
+            pool_address=swap["poolAddress"]
+        )
 
     class SecurityError(Exception):
         """Base security exception"""
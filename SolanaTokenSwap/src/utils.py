@@ -1 +1,126 @@
+import asyncio
+import contextlib
+import functools
+import itertools
+import random
+from typing import Dict, List, Optional, Tuple, Type
 
+import orjson
+
+# Responses such as the token registry arrive as a single multi-megabyte line
+WORKER_LINE_LIMIT = 64 * 1024 * 1024
+# Grace period for each shutdown step before escalating to terminate, then kill
+WORKER_CLOSE_TIMEOUT = 5.0
+
+class NodeWorker:
+    """Long-lived Node process answering id-tagged newline-delimited JSON over stdio"""
+
+    def __init__(self, command: List[str]):
+        self.command = command
+        self._proc: Optional[asyncio.subprocess.Process] = None
+        self._reader: Optional[asyncio.Task] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._request_ids = itertools.count(1)
+        self._start_lock = asyncio.Lock()
+
+    async def start(self) -> None:
+        """Spawn the worker once; concurrent callers share the same process"""
+        async with self._start_lock:
+            if self._proc is not None:
+                return
+            self._proc = await asyncio.create_subprocess_exec(
+                *self.command,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                limit=WORKER_LINE_LIMIT
+            )
+            self._reader = asyncio.create_task(self._read_responses(self._proc))
+
+    async def close(self) -> None:
+        """Shut down the worker and fail any requests still in flight"""
+        proc, reader = self._proc, self._reader
+        if proc is None:
+            return
+        proc.stdin.close()
+        for stop in (None, proc.terminate, proc.kill):
+            if stop is not None:
+                with contextlib.suppress(ProcessLookupError):
+                    stop()
+            try:
+                await asyncio.wait_for(proc.wait(), WORKER_CLOSE_TIMEOUT)
+                break
+            except asyncio.TimeoutError:
+                continue
+        await reader
+
+    async def _read_responses(self, proc: asyncio.subprocess.Process) -> None:
+        """Resolve pending requests by id as the worker answers them, in any order"""
+        failure = "Node worker exited unexpectedly"
+        try:
+            while line := await proc.stdout.readline():
+                try:
+                    response = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    continue
+                # Anything else on stdout, such as a library logging an array, is not a response
+                if not isinstance(response, dict):
+                    continue
+                future = self._pending.get(response.get("id"))
+                if future is None or future.done():
+                    continue
+                if response.get("error"):
+                    future.set_exception(RuntimeError(f"Worker request failed: {response['error']}"))
+                else:
+                    future.set_result(response.get("result"))
+        except Exception as e:
+            # e.g. a line over WORKER_LINE_LIMIT; the stream cannot be resynchronised after it
+            failure = f"Node worker output unreadable: {e!r}"
+        finally:
+            # Cleared so the next call respawns the worker instead of writing to a dead pipe
+            if self._proc is proc:
+                self._proc = None
+                self._reader = None
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(RuntimeError(failure))
+            # A worker we stopped reading from is useless; never leave it running orphaned
+            if proc.returncode is None:
+                with contextlib.suppress(ProcessLookupError):
+                    proc.kill()
+                await proc.wait()
+
+    async def call(self, op: str, timeout: Optional[float] = None, **params):
+        """Send one request to the worker and await its id-tagged response"""
+        await self.start()
+        request_id = next(self._request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            proc = self._proc
+            if proc is None:
+                raise RuntimeError("Node worker is not running")
+            try:
+                proc.stdin.write(orjson.dumps({"id": request_id, "op": op, **params}) + b"\n")
+                await proc.stdin.drain()
+            except ConnectionError as e:
+                raise RuntimeError(f"Node worker pipe closed: {e!r}") from e
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._pending.pop(request_id, None)
+
+def retry_async(attempts: int = 3,
+                base_delay: float = 0.2,
+                exceptions: Tuple[Type[BaseException], ...] = (Exception,)):
+    """Retry a coroutine function with exponential backoff and jitter"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            for attempt in range(attempts):
+                try:
+                    return await func(*args, **kwargs)
+                except exceptions:
+                    if attempt == attempts - 1:
+                        raise
+                    await asyncio.sleep(base_delay * 2 ** attempt * random.uniform(0.5, 1.5))
+        return wrapper
+    return decorator
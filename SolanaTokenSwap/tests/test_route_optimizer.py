@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("orjson")
+
+from src.route_optimizer import RouteOptimizer
+
+# source -> {target: output per unit of input}
+RATES = {
+    "SOL": {"USDC": 2.0, "RAY": 1.0},
+    "RAY": {"USDC": 3.0, "SOL": 1.0},
+    "USDC": {"SOL": 0.5, "RAY": 0.3},
+}
+
+
+class _GraphWorker:
+    """Serves connectivity and constant-rate quotes from RATES, recording each request"""
+
+    def __init__(self, rates):
+        self.rates = rates
+        self.calls = []
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def call(self, op, timeout=None, **params):
+        self.calls.append((op, params))
+        if op == "token_registry":
+            return {"SOL": {"symbol": "SOL"}}
+        if op == "connected":
+            return list(self.rates.get(params["mint"], {}))
+        if op == "quote":
+            rate = self.rates[params["source"]][params["target"]]
+            return {
+                "inputToken": {"amount": params["amount"]},
+                "outputToken": {"estimatedAmount": params["amount"] * rate},
+                "fees": {"tradeFee": 0.0, "ownerFee": 0.0},
+                "poolAddresses": [f"{params['source']}-{params['target']}"]
+            }
+        raise AssertionError(f"unexpected op {op}")
+
+
+def _find_routes(worker, **kwargs):
+    optimizer = RouteOptimizer(worker=worker)
+    return asyncio.run(optimizer.find_routes("SOL", "USDC", 1.0, **kwargs))
+
+
+def test_find_routes_ranks_multi_hop_route_by_output():
+    routes = _find_routes(_GraphWorker(RATES))
+
+    assert [[step.pool_address for step in route.path] for route in routes] == [
+        ["SOL-RAY", "RAY-USDC"],
+        ["SOL-USDC"],
+    ]
+    assert [route.total_output for route in routes] == [3.0, 2.0]
+    # Constant-rate pools have no price impact
+    assert all(route.price_impact == pytest.approx(0.0) for route in routes)
+
+
+def test_find_routes_respects_max_hops():
+    routes = _find_routes(_GraphWorker(RATES), max_hops=1)
+
+    assert [[step.pool_address for step in route.path] for route in routes] == [["SOL-USDC"]]
+
+
+def test_find_routes_never_revisits_a_token_on_the_path():
+    routes = _find_routes(_GraphWorker(RATES))
+
+    for route in routes:
+        visited = [route.path[0].source_mint, *(step.target_mint for step in route.path)]
+        assert len(visited) == len(set(visited))
+
+
+def test_find_routes_caches_connectivity_and_quotes():
+    worker = _GraphWorker(RATES)
+    optimizer = RouteOptimizer(worker=worker)
+
+    async def run():
+        await optimizer.find_routes("SOL", "USDC", 1.0)
+        first = len(worker.calls)
+        await optimizer.find_routes("SOL", "USDC", 1.0)
+        return first
+
+    first = asyncio.run(run())
+    assert len(worker.calls) == first
@@ -0,0 +1,237 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import time
+from types import SimpleNamespace
+
+import pytest
+
+for _module in ("httpx", "hyperscan", "numpy", "orjson", "solana", "solders"):
+    pytest.importorskip(_module)
+
+import orjson
+from solders.hash import Hash
+from solders.instruction import Instruction
+from solders.keypair import Keypair
+from solders.message import MessageV0
+from solders.pubkey import Pubkey
+from solders.transaction import VersionedTransaction
+
+from src.transaction_manager import SwapInstructions, SwapParams, TransactionManager
+
+SYSTEM_PROGRAM = Pubkey.from_string("11111111111111111111111111111111")
+
+
+def _signed_transaction(payer: Keypair) -> bytes:
+    message = MessageV0.try_compile(
+        payer.pubkey(),
+        [Instruction(SYSTEM_PROGRAM, b"", [])],
+        [],
+        Hash.default()
+    )
+    return bytes(VersionedTransaction(message, [payer]))
+
+
+@pytest.fixture
+def wallet(monkeypatch):
+    keypair = Keypair()
+    monkeypatch.setattr(
+        TransactionManager,
+        "_load_secure_wallet",
+        lambda self, path: SimpleNamespace(public_key=keypair.pubkey()),
+        raising=False
+    )
+    return keypair
+
+
+def test_wallet_signed_transaction_passes_verification(wallet):
+    manager = TransactionManager("wallet.json", "secret")
+    tx = manager._verify_transaction(_signed_transaction(wallet))
+    assert tx.message.account_keys[0] == wallet.pubkey()
+
+
+def test_foreign_transaction_fails_verification(wallet):
+    manager = TransactionManager("wallet.json", "secret")
+    with pytest.raises(TransactionManager.SecurityError):
+        manager._verify_transaction(_signed_transaction(Keypair()))
+
+
+def _instructions(raw: bytes) -> SwapInstructions:
+    return SwapInstructions(
+        transaction=raw,
+        recent_blockhash=str(Hash.default()),
+        compute_units=1_400_000,
+        quote_id="swap-test",
+        expires_at=0,
+        expected_out=1_000,
+        pool_address=str(Keypair().pubkey())
+    )
+
+
+def test_simulate_swap_reports_compute_units_and_mev_patterns(wallet):
+    manager = TransactionManager("wallet.json", "secret")
+    logs = [
+        "Program T1pyyaTNZsKv2WcRAB8oVnk93mLJw2XzjtVYqCsaHqt invoke [1]",
+        "Program log: Instruction: Swap"
+    ]
+
+    async def simulate_transaction(tx, **kwargs):
+        assert isinstance(tx, VersionedTransaction)
+        return SimpleNamespace(value=SimpleNamespace(err=None, units_consumed=4_321, logs=logs))
+
+    manager.client.simulate_transaction = simulate_transaction
+
+    async def run():
+        try:
+            return await manager.simulate_swap(_instructions(_signed_transaction(wallet)))
+        finally:
+            await manager.close()
+
+    assert asyncio.run(run()) == {"compute_units": 4_321, "potential_mev": ["jito_tip"]}
+
+
+def test_simulate_swap_raises_on_failed_simulation(wallet):
+    manager = TransactionManager("wallet.json", "secret")
+
+    async def simulate_transaction(tx, **kwargs):
+        return SimpleNamespace(value=SimpleNamespace(err="InstructionError", units_consumed=0, logs=[]))
+
+    manager.client.simulate_transaction = simulate_transaction
+
+    async def run():
+        try:
+            await manager.simulate_swap(_instructions(_signed_transaction(wallet)))
+        finally:
+            await manager.close()
+
+    with pytest.raises(TransactionManager.SimulationError):
+        asyncio.run(run())
+
+
+def _signed_response(nonce: str, secret: bytes = b"secret") -> dict:
+    payload = orjson.dumps({
+        "status": "success",
+        "swapInstructions": {
+            "serializedTransaction": base64.b64encode(b"unsigned").decode(),
+            "recentBlockhash": str(Hash.default()),
+            "computeUnits": 1_400_000,
+            "expectedOut": 1_000,
+            "poolAddress": str(SYSTEM_PROGRAM)
+        },
+        "metadata": {"quoteId": f"swap-{nonce}", "preparedAt": 0, "expiresAt": 0, "nonce": nonce}
+    })
+    return {"sig": hmac.new(secret, payload, hashlib.sha512).hexdigest(), "payload": payload.decode()}
+
+
+def _validate(manager: TransactionManager, signed: dict, nonce: str) -> dict:
+    return manager._validate_swap_response(signed["sig"], signed["payload"].encode(), nonce)
+
+
+def test_swap_response_passes_validation(wallet):
+    manager = TransactionManager("wallet.json", "secret")
+    nonce = manager._issue_nonce()
+    assert _validate(manager, _signed_response(nonce), nonce)["metadata"]["nonce"] == nonce
+
+
+def test_tampered_swap_response_fails_validation(wallet):
+    manager = TransactionManager("wallet.json", "secret")
+    nonce = manager._issue_nonce()
+    signed = _signed_response(nonce)
+    signed["payload"] = signed["payload"].replace('"expectedOut":1000', '"expectedOut":9000')
+    with pytest.raises(TransactionManager.SecurityError, match="signature"):
+        _validate(manager, signed, nonce)
+
+
+def test_swap_response_signed_with_another_key_fails_validation(wallet):
+    manager = TransactionManager("wallet.json", "secret")
+    nonce = manager._issue_nonce()
+    with pytest.raises(TransactionManager.SecurityError, match="signature"):
+        _validate(manager, _signed_response(nonce, secret=b"other"), nonce)
+
+
+def test_swap_response_for_another_nonce_fails_validation(wallet):
+    manager = TransactionManager("wallet.json", "secret")
+    nonce, other = manager._issue_nonce(), manager._issue_nonce()
+    with pytest.raises(TransactionManager.SecurityError, match="mismatch"):
+        _validate(manager, _signed_response(other), nonce)
+
+
+def test_replayed_swap_response_fails_validation(wallet):
+    manager = TransactionManager("wallet.json", "secret")
+    nonce = manager._issue_nonce()
+    signed = _signed_response(nonce)
+    _validate(manager, signed, nonce)
+    with pytest.raises(TransactionManager.SecurityError, match="already used"):
+        _validate(manager, signed, nonce)
+
+
+def test_swap_response_with_expired_nonce_fails_validation(wallet):
+    manager = TransactionManager("wallet.json", "secret")
+    nonce = manager._issue_nonce()
+    manager.nonces[nonce] = time.monotonic() - 1
+    with pytest.raises(TransactionManager.SecurityError, match="expired"):
+        _validate(manager, _signed_response(nonce), nonce)
+
+
+class _BatchWorker:
+    """Answers prepare_batch with a signed response per item, failing or dropping chosen mints"""
+
+    def __init__(self, failing=(), dropped=()):
+        self.failing = set(failing)
+        self.dropped = set(dropped)
+        self.batches = []
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def call(self, op, timeout=None, **params):
+        assert op == "prepare_batch"
+        self.batches.append(params["items"])
+        results = []
+        for item in params["items"]:
+            if item["sourceTokenMint"] in self.dropped:
+                continue
+            if item["sourceTokenMint"] in self.failing:
+                results.append({"nonce": item["nonce"], "error": "No relevant pools found"})
+            else:
+                results.append({"nonce": item["nonce"], **_signed_response(item["nonce"])})
+        return results
+
+
+def _prepare_all(manager: TransactionManager, mints) -> list:
+    async def run():
+        try:
+            return await asyncio.gather(*[
+                manager.prepare_swap(SwapParams(mint, "target", 1_000, 0.5, str(SYSTEM_PROGRAM)))
+                for mint in mints
+            ], return_exceptions=True)
+        finally:
+            await manager.close()
+
+    return asyncio.run(run())
+
+
+def test_batch_item_error_fails_only_that_swap(wallet):
+    worker = _BatchWorker(failing={"bad"})
+    manager = TransactionManager("wallet.json", "secret", max_batch_size=3, flush_interval_ms=50, worker=worker)
+
+    good, bad, other = _prepare_all(manager, ["good", "bad", "other"])
+
+    assert len(worker.batches) == 1 and len(worker.batches[0]) == 3
+    assert isinstance(good, SwapInstructions) and isinstance(other, SwapInstructions)
+    assert good.quote_id != other.quote_id
+    assert isinstance(bad, RuntimeError) and "No relevant pools found" in str(bad)
+
+
+def test_batch_item_missing_from_response_fails_only_that_swap(wallet):
+    worker = _BatchWorker(dropped={"lost"})
+    manager = TransactionManager("wallet.json", "secret", max_batch_size=2, flush_interval_ms=50, worker=worker)
+
+    good, lost = _prepare_all(manager, ["good", "lost"])
+
+    assert isinstance(good, SwapInstructions)
+    assert isinstance(lost, RuntimeError) and "missing from batch response" in str(lost)
@@ -60,7 +60,7 @@ async function establishConnectionWithRetry(endpoint: string, maxRetries = 3): P
         } catch (error) {
             attempt++;
             if (attempt >= maxRetries) {
-                throw new Error(`Failed to connect after ${maxRetries} attempts: ${error.message}`);
+                throw new Error(`Failed to connect after ${maxRetries} attempts: ${error instanceof Error ? error.message : String(error)}`);
             }
             await new Promise(resolve => setTimeout(resolve, retryDelay(attempt)));
         }
@@ -155,25 +155,26 @@ export async function fetchRaydiumPools(
                         version: 4 // Explicit version identification for compatibility
                     };
                 } catch (error) {
-                    console.error(`Error processing pool ${pool.id.toBase58()}: ${error.message}`);
+                    console.error(`Error processing pool ${pool.id.toBase58()}: ${error instanceof Error ? error.message : String(error)}`);
                     return null;
                 }
             })
             .filter((pool): pool is PoolInfo => pool !== null);
     } catch (error) {
         console.error("Critical error fetching pools:", error);
-        throw new Error(`Failed to fetch pools: ${error.message}`);
+        throw new Error(`Failed to fetch pools: ${error instanceof Error ? error.message : String(error)}`);
     }
 }
 
 // Example usage (compatible with getQuotes.ts)
-(async () => {
+if (require.main === module) (async () => {
     try {
         const pools = await fetchRaydiumPools();
-        console.log("Fetched", pools.length, "valid pools");
-        console.log(JSON.stringify(pools.slice(0, 2), null, 2)); // Sample output
+        console.error("Fetched", pools.length, "valid pools");
+        // stdout carries only the pool array so PoolManager can parse it directly
+        process.stdout.write(JSON.stringify(pools));
     } catch (error) {
-        console.error("Error:", error.message);
+        console.error("Error:", error instanceof Error ? error.message : String(error));
         process.exit(1);
     }
 })();
@@ -19,7 +19,7 @@ interface QuoteInput {
     verbose?: boolean;
 }
 
-interface QuoteOutput {
+export interface QuoteOutput {
     inputToken: {
         mint: string;
         symbol: string;
@@ -80,7 +80,7 @@ async function establishConnectionWithRetry(endpoint: string, retries: number):
     throw new Error("Connection failed after maximum retries");
 }
 
-async function getQuote(params: QuoteInput): Promise<QuoteOutput> {
+export async function getQuote(params: QuoteInput): Promise<QuoteOutput> {
     const {
         sourceTokenMint,
         targetTokenMint,
@@ -147,7 +147,7 @@ async function getQuote(params: QuoteInput): Promise<QuoteOutput> {
             }
         });
 
-        const trades = (await Promise.all(tradePromises)).filter(t => t !== null);
+        const trades = (await Promise.all(tradePromises)).filter((t): t is NonNullable<typeof t> => t !== null);
         if (trades.length === 0) throw new Error("No valid trades could be computed.");
 
         const bestTrade = trades.reduce((best, current) => 
@@ -216,7 +216,7 @@ async function getQuote(params: QuoteInput): Promise<QuoteOutput> {
 }
 
 // Example usage with real mint addresses
-(async () => {
+if (require.main === module) (async () => {
     try {
         const quote = await getQuote({
             sourceTokenMint: "So11111111111111111111111111111111111111112", // SOL
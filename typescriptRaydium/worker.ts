@@ -0,0 +1,118 @@
+import { createInterface } from "readline";
+import { PublicKey } from "@solana/web3.js";
+import { getQuote } from "./getQuote";
+import { fetchRaydiumPools } from "./fetchPools";
+import { prepareSwapTransaction, signPayload } from "./swap";
+import { buildTokenMetadataMap, sanitizeError } from "./tsUtils";
+
+interface WorkerRequest {
+    id: number;
+    op: string;
+    [key: string]: any;
+}
+
+interface QuoteRequest {
+    source: string;
+    target: string;
+    amount: number;
+}
+
+interface PrepareRequest {
+    sourceTokenMint: string;
+    targetTokenMint: string;
+    amount: number;
+    slippage: number;
+    userPublicKey: string;
+    rpcEndpoint?: string;
+    nonce: string;
+    mevProtection?: boolean;
+}
+
+type Handler = (request: WorkerRequest) => Promise<unknown>;
+
+/**
+ * Quotes that cannot be computed resolve to null so callers can skip the hop
+ */
+async function quoteOrNull(request: QuoteRequest, rpcEndpoint?: string) {
+    try {
+        return await getQuote({
+            sourceTokenMint: request.source,
+            targetTokenMint: request.target,
+            amount: request.amount,
+            rpcEndpoint
+        });
+    } catch (error) {
+        return null;
+    }
+}
+
+/**
+ * Prepares one swap and signs the serialized response for HMAC verification in Python
+ */
+async function prepareSigned(request: PrepareRequest) {
+    const prepared = await prepareSwapTransaction({
+        sourceTokenMint: request.sourceTokenMint,
+        targetTokenMint: request.targetTokenMint,
+        amountInBaseUnits: request.amount,
+        slippageTolerance: request.slippage,
+        userPublicKey: new PublicKey(request.userPublicKey),
+        rpcEndpoint: request.rpcEndpoint,
+        nonce: request.nonce,
+        mevProtection: request.mevProtection
+    });
+    return signPayload(prepared);
+}
+
+const handlers: Record<string, Handler> = {
+    // Round trip with no work, used to start the process before the first real request
+    noop: async () => null,
+
+    token_registry: async () => Object.fromEntries(buildTokenMetadataMap()),
+
+    quote: async ({ source, target, amount, rpcEndpoint }) =>
+        quoteOrNull({ source, target, amount }, rpcEndpoint),
+
+    connected: async ({ mint, rpcEndpoint }) => {
+        const pools = await fetchRaydiumPools(rpcEndpoint);
+        return pools
+            .filter(p => p.tokenA.mint === mint || p.tokenB.mint === mint)
+            .map(p => p.tokenA.mint === mint ? p.tokenB.mint : p.tokenA.mint);
+    },
+
+    prepare: async (request) => prepareSigned(request as unknown as PrepareRequest),
+
+    // Items are prepared concurrently and settle independently, so one bad item
+    // only fails its own entry; each entry carries its nonce for correlation
+    prepare_batch: async ({ items }) => {
+        const settled = await Promise.allSettled((items as PrepareRequest[]).map(prepareSigned));
+        return settled.map((outcome, i) => outcome.status === "fulfilled"
+            ? { nonce: items[i].nonce, ...outcome.value }
+            : { nonce: items[i].nonce, error: sanitizeError(outcome.reason) });
+    }
+};
+
+function respond(message: object): void {
+    process.stdout.write(JSON.stringify(message) + "\n");
+}
+
+/**
+ * Long-lived worker answering newline-delimited JSON requests on stdin.
+ * Every response echoes the request id so the caller can correlate it.
+ */
+createInterface({ input: process.stdin }).on("line", async (line) => {
+    let request: WorkerRequest;
+    try {
+        request = JSON.parse(line);
+    } catch (error) {
+        respond({ id: null, error: `Malformed request: ${sanitizeError(error)}` });
+        return;
+    }
+
+    const handler = handlers[request.op];
+    try {
+        if (!handler) throw new Error(`Unknown op ${request.op}`);
+        respond({ id: request.id, result: await handler(request) });
+    } catch (error) {
+        respond({ id: request.id, error: sanitizeError(error) });
+    }
+});